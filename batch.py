@@ -0,0 +1,43 @@
+import argparse
+import os
+from src.chatbot import UniversalChatbot
+from src.batch_runner import BatchRunner
+from config.settings import BATCH_MAX_WORKERS, BATCH_EMBED_SIZE, LLM_REQUESTS_PER_MINUTE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Answer a JSONL file of queries against the indexed documents without the UI."
+    )
+    parser.add_argument("input", help='JSONL file with one {"id": ..., "query": ...} per line')
+    parser.add_argument("output", help="JSONL file to append results to; reused to resume a run")
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS,
+                        help="Number of queries answered concurrently")
+    parser.add_argument("--rpm", type=int, default=LLM_REQUESTS_PER_MINUTE,
+                        help="Maximum LLM requests per minute, overriding LLM_REQUESTS_PER_MINUTE "
+                             "(0 disables the limit)")
+    parser.add_argument("--embed-batch-size", type=int, default=BATCH_EMBED_SIZE,
+                        help="Number of queries embedded per model call")
+    parser.add_argument("-k", type=int, default=5, help="Documents retrieved per query")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Only run this many pending queries")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    chatbot = UniversalChatbot()
+    chatbot.llm.set_requests_per_minute(args.rpm)
+    runner = BatchRunner(
+        chatbot,
+        max_workers=args.workers,
+        embed_batch_size=args.embed_batch_size,
+        k=args.k,
+    )
+    summary = runner.run(args.input, args.output, limit=args.limit)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    os.makedirs("data/vector_db", exist_ok=True)
+    raise SystemExit(main())
@@ -9,12 +9,27 @@ SERPER_API_KEY: str = os.getenv("SERPER_API_KEY", "")
 
 # === Model Settings ===
 LLM_MODEL: str = os.getenv("LLM_MODEL", "gemini-2.5-flash")  
+# Models tried in order when LLM_MODEL keeps failing, comma separated
+LLM_FALLBACK_MODELS = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "gemini-2.0-flash").split(",") if m.strip()]
+# "gemini" for the Gemini API, "local" for the deterministic offline ChatGemini stub
+LLM_BACKEND: str = os.getenv("LLM_BACKEND", "gemini")
 EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 
+# === LLM Gateway Settings ===
+LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", 60))
+LOCAL_LLM_LATENCY: float = float(os.getenv("LOCAL_LLM_LATENCY", 0))
+
 # === Vector Store Settings ===
 VECTOR_DB_PATH: str = os.getenv("VECTOR_DB_PATH", "data/vector_db")
-CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", 1000))
-CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", 200))
+
+# === Chunking Settings (sizes in embedding-model tokens) ===
+CHUNK_TOKENS: int = int(os.getenv("CHUNK_TOKENS", 200))
+CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", 30))
+PARENT_CHUNK_TOKENS: int = int(os.getenv("PARENT_CHUNK_TOKENS", 600))
+CONTEXT_TOKENS: int = int(os.getenv("CONTEXT_TOKENS", 2000))
 
 # === Web Search Settings ===
 MAX_SEARCH_RESULTS: int = int(os.getenv("MAX_SEARCH_RESULTS", 5))
@@ -24,3 +39,7 @@ WEB_SEARCH_KEYWORDS = [
     "explain", "how does", "what is", "vs", "compared to",
     "alternatives", "price", "cost", "stock", "trend"
 ]
+
+# === Batch Settings ===
+BATCH_MAX_WORKERS: int = int(os.getenv("BATCH_MAX_WORKERS", 8))
+BATCH_EMBED_SIZE: int = int(os.getenv("BATCH_EMBED_SIZE", 64))
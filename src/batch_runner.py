@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set
+
+from config.settings import BATCH_MAX_WORKERS, BATCH_EMBED_SIZE
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        chatbot,
+        max_workers: int = BATCH_MAX_WORKERS,
+        embed_batch_size: int = BATCH_EMBED_SIZE,
+        k: int = 5,
+    ):
+        """
+        Answer many queries offline with a ``UniversalChatbot``.
+
+        Queries are routed up front, document queries are embedded in
+        batches, and retrieval plus generation run concurrently. LLM calls
+        are rate limited by the chatbot's LLM gateway.
+        """
+        self.chatbot = chatbot
+        self.max_workers = max(max_workers, 1)
+        self.embed_batch_size = max(embed_batch_size, 1)
+        self.k = k
+        self.write_lock = threading.Lock()
+
+    @staticmethod
+    def load_queries(input_path: str) -> List[Dict]:
+        """
+        Read queries from a JSONL file.
+
+        Each line must have a "query" field and may have an "id"; lines
+        without an id are numbered by their position in the file.
+        """
+        queries = []
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_num, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    print(f"[BatchRunner] Skipping line {line_num + 1}: invalid JSON ({e})")
+                    continue
+                if not isinstance(record, dict) or not record.get("query"):
+                    print(f"[BatchRunner] Skipping line {line_num + 1}: missing 'query'")
+                    continue
+                record.setdefault("id", str(line_num))
+                record["id"] = str(record["id"])
+                queries.append(record)
+        return queries
+
+    @staticmethod
+    def load_completed(output_path: str) -> Set[str]:
+        """Return ids already answered without error in an existing output file"""
+        completed = set()
+        if not os.path.exists(output_path):
+            return completed
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partial line from an interrupted run
+                    continue
+                if not record.get("error"):
+                    completed.add(str(record.get("id")))
+        return completed
+
+    def _batches(self, items: List, size: int) -> Iterator[List]:
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    def _embed(self, records: List[Dict]) -> None:
+        """Attach query embeddings to records that need document retrieval"""
+        pending = [r for r in records if r["route"] in ("document", "hybrid")]
+        for batch in self._batches(pending, self.embed_batch_size):
+            start = time.perf_counter()
+            embeddings = self.chatbot.vector_store.embed_queries([r["query"] for r in batch])
+            # Spread the batch cost evenly so per-query timings still add up
+            elapsed = (time.perf_counter() - start) / len(batch)
+            for record, embedding in zip(batch, embeddings):
+                record["embedding"] = embedding
+                record["timings"]["embed"] = elapsed
+
+    def _answer(self, record: Dict) -> Dict:
+        """Retrieve and answer one routed query"""
+        timings = record["timings"]
+        relevant_docs = None
+        try:
+            if "embedding" in record:
+                start = time.perf_counter()
+                relevant_docs = self.chatbot.vector_store.similarity_search_by_vector(
+                    record["embedding"], k=self.k
+                )
+                timings["retrieve"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = self.chatbot.answer_query(
+                record["query"], route=record["route"], relevant_docs=relevant_docs
+            )
+            timings["generate"] = time.perf_counter() - start
+            # The chatbot reports its own failures with an "error" source; hybrid
+            # answers merge sources, so a failed half leaves it among the others
+            error = response["answer"] if "error" in response.get("sources", []) else None
+        except Exception as e:
+            return self._error_result(record, e)
+
+        timings["total"] = sum(timings.values())
+        return {
+            "id": record["id"],
+            "query": record["query"],
+            "route": response.get("route_used", record["route"]),
+            "answer": response.get("answer", ""),
+            "sources": response.get("sources", []),
+            "timings": timings,
+            "error": error,
+        }
+
+    def _error_result(self, record: Dict, error: Exception) -> Dict:
+        """Build the result for a query that failed outside the chatbot"""
+        print(f"[BatchRunner] Query {record['id']} failed: {error}")
+        timings = record["timings"]
+        timings["total"] = sum(timings.values())
+        return {
+            "id": record["id"],
+            "query": record["query"],
+            "route": record["route"],
+            "answer": "",
+            "sources": [],
+            "timings": timings,
+            "error": str(error),
+        }
+
+    def _write(self, out, result: Dict, summary: Dict) -> None:
+        """
+        Append one result to the output file and count it.
+
+        Runs in executor done-callbacks, where exceptions would be swallowed,
+        so a result that cannot be written is logged and counted as failed;
+        it is missing from the file and will be retried on resume.
+        """
+        with self.write_lock:
+            try:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+            except Exception as e:
+                print(f"[BatchRunner] Could not write result for query {result.get('id')}: {e}")
+                summary["failed"] += 1
+                return
+            summary["failed" if result["error"] else "succeeded"] += 1
+
+    def run(self, input_path: str, output_path: str, limit: Optional[int] = None) -> Dict:
+        """
+        Answer every query in ``input_path`` and append results to ``output_path``.
+
+        Results are written as soon as each query finishes, so an interrupted
+        run can be resumed by pointing it at the same output file: queries
+        already answered without error are skipped and failed ones are retried,
+        so when an id appears more than once its last line is authoritative.
+
+        Returns:
+            Summary counts with keys "total", "skipped", "succeeded", "failed",
+            plus "llm" gateway totals when the chatbot uses the LLM gateway
+        """
+        queries = self.load_queries(input_path)
+        completed = self.load_completed(output_path)
+        pending = [q for q in queries if q["id"] not in completed]
+        if limit is not None:
+            pending = pending[:limit]
+
+        summary = {
+            "total": len(queries),
+            "skipped": len(queries) - len(pending),
+            "succeeded": 0,
+            "failed": 0,
+        }
+        print(f"[BatchRunner] {len(pending)} queries to run, {summary['skipped']} skipped")
+        if not pending:
+            return summary
+
+        has_docs = self.chatbot.qa_chain is not None
+        for record in pending:
+            start = time.perf_counter()
+            record["route"] = self.chatbot.query_router.route_query(record["query"], has_docs)
+            record["timings"] = {"route": time.perf_counter() - start}
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Submit each embedded batch straight away so generation overlaps
+            # with embedding of the next one; each result is written by a
+            # done-callback as soon as its query finishes
+            for batch in self._batches(pending, self.embed_batch_size):
+                try:
+                    self._embed(batch)
+                except Exception as e:
+                    # Record the whole batch as failed so a resumed run retries it
+                    for record in batch:
+                        self._write(out, self._error_result(record, e), summary)
+                    continue
+                for record in batch:
+                    future = executor.submit(self._answer, record)
+                    future.add_done_callback(lambda f: self._write(out, f.result(), summary))
+
+        if hasattr(self.chatbot.llm, "get_stats"):
+            llm_stats = self.chatbot.llm.get_stats()
+            llm_stats.pop("recent_calls", None)
+            summary["llm"] = llm_stats
+            print(f"[BatchRunner] LLM usage: {llm_stats}")
+        print(
+            f"[BatchRunner] Done: {summary['succeeded']} succeeded, "
+            f"{summary['failed']} failed, {summary['skipped']} skipped"
+        )
+        return summary
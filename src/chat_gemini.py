@@ -1,43 +1,54 @@
-from langchain.base_language import BaseLanguageModel
-from langchain.schema import LLMResult
+import hashlib
+import re
+import time
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain.schema import AIMessage, BaseMessage, ChatGeneration, ChatResult
 from typing import Any, List, Mapping, Optional
 
-class ChatGemini(BaseLanguageModel):
-    model: str
-    api_key: str
-    temperature: float = 0.7
-
-    # abstract methods
-
-    def _call(self, *args, **kwargs) -> str:
-        prompt = kwargs.get("prompt", args[0] if args else "")
-        return f"[Gemini response] Prompt received: {prompt}"
-
-    async def _acall(self, *args, **kwargs) -> str:
-        return self._call(*args, **kwargs)
-
-    def invoke(self, *args, **kwargs) -> Any:
-        class Response:
-            content = self._call(*args, **kwargs)
-        return Response()
-
-    def predict(self, *args, **kwargs) -> str:
-        return self._call(*args, **kwargs)
-
-    async def apredict(self, *args, **kwargs) -> str:
-        return await self._acall(*args, **kwargs)
-
-    def predict_messages(self, *args, **kwargs):
-        return self._call(*args, **kwargs)
-
-    async def apredict_messages(self, *args, **kwargs):
-        return await self._acall(*args, **kwargs)
-
-    def generate_prompt(self, *args, **kwargs) -> LLMResult:
-        return LLMResult(generations=[])
-
-    async def agenerate_prompt(self, *args, **kwargs) -> LLMResult:
-        return LLMResult(generations=[])
+QUESTION_PATTERN = re.compile(r"Question:\s*(.+)")
+
+
+class ChatGemini(BaseChatModel):
+    """
+    Deterministic offline stand-in for Gemini.
+
+    Answers are derived from a hash of the prompt, so the same prompt always
+    gets the same answer, and token usage is reported from word counts. Set
+    ``latency`` to simulate network time when benchmarking the pipeline.
+    """
+
+    model: str = "local-gemini"
+    temperature: float = 0.0
+    latency: float = 0.0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        questions = QUESTION_PATTERN.findall(prompt)
+        subject = questions[-1].strip() if questions else prompt.strip()[:200]
+        content = f"[{self.model} {digest}] Answer to: {subject}"
+
+        input_tokens = len(prompt.split())
+        output_tokens = len(content.split())
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"model": self.model, "token_usage": usage},
+        )
 
     @property
     def _identifying_params(self) -> Mapping[str, Any]:
@@ -1,8 +1,9 @@
-from typing import Dict
+from typing import Dict, List, Optional
 import streamlit as st
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI  
+from langchain.schema import Document
+from src.llm_gateway import create_llm, LLMGatewayError
 from src.document_processor import DocumentProcessor
 from src.vector_store import VectorStore
 from src.query_router import QueryRouter
@@ -13,29 +14,23 @@ from config.settings import *
 class UniversalChatbot:
     def __init__(self):
         try:
-            print("[Chatbot] Initializing LLM with official Gemini integration...")
-            model_name = LLM_MODEL if LLM_MODEL else "gemini-2.5-flash"
-            print(f"[Chatbot] Using model: {model_name}")
-            
-            self.llm = ChatGoogleGenerativeAI(
-                model=model_name,  
-                google_api_key=GEMINI_API_KEY,
-                temperature=0.7,
-                convert_system_message_to_human=True 
-            )
+            print(f"[Chatbot] Initializing LLM gateway with {LLM_BACKEND} backend...")
+            # All LLM calls, including the QA chain's, go through the gateway
+            self.llm = create_llm(LLM_BACKEND)
+            print(f"[Chatbot] Using models: {self.llm._identifying_params['backends']}")
             
             test_response = self.llm.invoke("Test connection")
             print(f"[Chatbot]  LLM test successful, response type: {type(test_response)}")
 
             print("[Chatbot] Initializing components...")
-            self.document_processor = DocumentProcessor(CHUNK_SIZE, CHUNK_OVERLAP)
+            self.document_processor = DocumentProcessor(CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, PARENT_CHUNK_TOKENS)
             self.vector_store = VectorStore(VECTOR_DB_PATH)
             self.query_router = QueryRouter()
             self.web_searcher = WebSearcher()
 
             self.qa_chain = None
             self._setup_qa_chain()
-            print("[Chatbot]  Initialized successfully with Gemini Pro")
+            print("[Chatbot]  Initialized successfully")
             
         except Exception as e:
             print(f"[Chatbot]  Initialization failed: {e}")
@@ -74,13 +69,13 @@ class UniversalChatbot:
                 f.write(uploaded_file.getbuffer())
 
             print(f"[Chatbot] Processing document: {uploaded_file.name}")
-            documents = self.document_processor.process_document(file_path, uploaded_file.name)
-            print(f"[Chatbot] Generated {len(documents)} document chunks")
+            documents, parents = self.document_processor.process_document(file_path, uploaded_file.name)
+            print(f"[Chatbot] Generated {len(documents)} document chunks in {len(parents)} parents")
             
             if documents:
                 print(f"[Chatbot] Sample chunk: {documents[0].page_content[:200]}...")
                 
-            self.vector_store.add_documents(documents)
+            self.vector_store.add_documents(documents, parents)
 
             self._setup_qa_chain()
             print(f"[Chatbot] Successfully processed {uploaded_file.name}")
@@ -93,10 +88,17 @@ class UniversalChatbot:
             traceback.print_exc()
             return False
 
-    def answer_query(self, query: str) -> Dict:
-        """Route and answer query"""
-        has_docs = self.qa_chain is not None
-        route = self.query_router.route_query(query, has_docs)
+    def answer_query(self, query: str, route: Optional[str] = None,
+                     relevant_docs: Optional[List[Document]] = None) -> Dict:
+        """Route and answer query.
+
+        ``route`` and ``relevant_docs`` may be supplied by callers that have
+        already routed the query and retrieved its documents (e.g. the batch
+        runner), in which case those steps are skipped here.
+        """
+        if route is None:
+            has_docs = self.qa_chain is not None
+            route = self.query_router.route_query(query, has_docs)
 
         response = {"answer": "", "sources": [], "route_used": route}
         
@@ -104,15 +106,16 @@ class UniversalChatbot:
         print(f"[Chatbot] Route: {route}")
 
         if route == "document":
-            response.update(self._answer_from_documents(query))
+            response.update(self._answer_from_documents(query, relevant_docs))
         elif route == "web":
             response.update(self._answer_from_web(query))
         else:  # hybrid response
-            response.update(self._answer_hybrid(query))
+            response.update(self._answer_hybrid(query, relevant_docs))
 
         return response
 
-    def _answer_from_documents(self, query: str) -> Dict:
+    def _answer_from_documents(self, query: str,
+                               relevant_docs: Optional[List[Document]] = None) -> Dict:
         """Answer using only documents"""
         if not self.qa_chain:
             return {
@@ -122,8 +125,9 @@ class UniversalChatbot:
 
         try:
             # check if relevant documents present
-            print("[Debug] Searching for relevant documents...")
-            relevant_docs = self.vector_store.similarity_search(query, k=5)
+            if relevant_docs is None:
+                print("[Debug] Searching for relevant documents...")
+                relevant_docs = self.vector_store.similarity_search(query, k=5)
             
             if not relevant_docs:
                 return {
@@ -132,10 +136,17 @@ class UniversalChatbot:
                 }
 
             print(f"[Debug] Found {len(relevant_docs)} relevant documents")
+            # Small chunks find the match; their parents give the LLM context
+            context_docs = self.vector_store.expand_to_parents(relevant_docs, CONTEXT_TOKENS)
+            print(f"[Debug] Expanded to {len(context_docs)} context documents")
 
             try:
                 print("[Debug] Invoking QA chain...")
-                result = self.qa_chain.invoke({"query": query})
+                # Skip the chain's retriever so the query is not embedded twice
+                result = self.qa_chain.combine_documents_chain.invoke(
+                    {"input_documents": context_docs, "question": query}
+                )
+                result["source_documents"] = context_docs
                 
                 print(f"[Debug] QA chain result type: {type(result)}")
                 print(f"[Debug] QA chain result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
@@ -155,7 +166,7 @@ class UniversalChatbot:
                             sources.append(filename)
                 else:
                     answer = str(result)
-                    sources = [doc.metadata.get("filename", "Unknown") for doc in relevant_docs]
+                    sources = [doc.metadata.get("filename", "Unknown") for doc in context_docs]
                 
                 if hasattr(answer, 'content'):
                     answer = answer.content
@@ -164,13 +175,19 @@ class UniversalChatbot:
                 
                 print(f"[Debug] QA chain succeeded, answer length: {len(answer) if answer else 0}")
                 
+            except LLMGatewayError as e:
+                # The gateway already retried and failed over; another prompt
+                # would only add load while the backends are failing
+                print(f"[Debug] LLM unavailable, skipping fallback: {str(e)}")
+                return {"answer": f"Error processing documents: {str(e)}", "sources": ["error"]}
+
             except Exception as e:
                 print(f"[Debug] QA chain failed: {str(e)}")
                 # Fallback to direct LLM call
                 print("[Debug] Using direct LLM fallback...")
                 
                 context_parts = []
-                for i, doc in enumerate(relevant_docs[:3]):
+                for i, doc in enumerate(context_docs):
                     context_parts.append(f"Document {i+1}:\n{doc.page_content}")
                 
                 context = "\n\n".join(context_parts)
@@ -191,7 +208,7 @@ Answer:"""
                     else:
                         answer = str(response)
                         
-                    sources = [doc.metadata.get("filename", "Unknown") for doc in relevant_docs]
+                    sources = [doc.metadata.get("filename", "Unknown") for doc in context_docs]
                     sources = list(set(sources))
                     
                 except Exception as fallback_error:
@@ -252,12 +269,17 @@ Detailed Answer:"""
             print(f"[Chatbot] Web search error: {e}")
             return {"answer": f"Web search error: {str(e)}", "sources": ["error"]}
 
-    def _answer_hybrid(self, query: str) -> Dict:
+    def _answer_hybrid(self, query: str,
+                       relevant_docs: Optional[List[Document]] = None) -> Dict:
         """Answer using both documents and web search"""
         try:
-            doc_response = self._answer_from_documents(query)
+            doc_response = self._answer_from_documents(query, relevant_docs)
             web_response = self._answer_from_web(query)
 
+            if "error" in doc_response["sources"] and "error" in web_response["sources"]:
+                # Nothing to combine, and the LLM may be the reason both failed
+                return {"answer": doc_response["answer"], "sources": ["error"]}
+
             combined_prompt = f"""You have information from both uploaded documents and web search. 
 Provide a unified, factually correct, and helpful answer that combines relevant information from both sources.
 
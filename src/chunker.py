@@ -0,0 +1,257 @@
+import re
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+from config.settings import CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, PARENT_CHUNK_TOKENS, EMBEDDING_MODEL
+
+# Numbered headings ("2.1 Exclusions", "3. Claims"); a bare number ("30 days ...")
+# is not enough to make a heading
+NUMBERED_HEADING_PATTERN = re.compile(r"^(?:\d+(?:\.\d+)+\.?|\d+\.)\s+[A-Za-z].{0,60}$")
+# All-caps headings ("SCHEDULE OF BENEFITS"), which must also contain two
+# alphabetic words so codes and totals ("UIN: BAJ23020", "TOTAL 500") don't count
+CAPS_HEADING_PATTERN = re.compile(r"^[A-Z][A-Z0-9 ,&/()'\-:]{2,80}$")
+CAPS_WORD_PATTERN = re.compile(r"\b[A-Z]{2,}\b")
+# Lines with at least three columns separated by tabs, runs of spaces or pipes;
+# only a run of two or more such lines is treated as a table
+TABLE_PATTERN = re.compile(r"\S(?:\t| {2,})\S.*(?:\t| {2,})\S|\|.*\|")
+# Boundaries tried, in order, when a block is too large for one chunk
+LINE_PATTERN = re.compile(r"\S(?:[^\n]*\S)?")
+SENTENCE_PATTERN = re.compile(r"\S.*?(?:[.!?;:](?=\s)|$)")
+# Fallback tokens when the model tokenizer is unavailable
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class TextChunker:
+    def __init__(
+        self,
+        chunk_tokens: int = CHUNK_TOKENS,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+        parent_tokens: int = PARENT_CHUNK_TOKENS,
+        tokenizer_name: str = EMBEDDING_MODEL,
+    ):
+        """
+        Split page text into token-sized child chunks grouped under larger
+        parent chunks. Children are small enough to embed well; parents
+        give the LLM surrounding context.
+
+        Chunks never cross a page or heading, and paragraphs and tables are
+        only split when they alone exceed the child size.
+        """
+        self.chunk_tokens = max(chunk_tokens, 1)
+        self.chunk_overlap = min(max(chunk_overlap, 0), self.chunk_tokens - 1)
+        self.parent_tokens = max(parent_tokens, self.chunk_tokens)
+        self.tokenizer = self._load_tokenizer(tokenizer_name)
+
+    def _load_tokenizer(self, tokenizer_name: str):
+        """Load the embedding model's compiled (Rust) tokenizer"""
+        try:
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+            # Counts must cover the whole text, not the model's input window
+            tokenizer.no_truncation()
+            tokenizer.no_padding()
+            return tokenizer
+        except Exception as e:
+            print(f"[Chunker] Could not load tokenizer {tokenizer_name}, counting words instead: {e}")
+            return None
+
+    def token_offsets(self, texts: List[str]) -> List[List[Tuple[int, int]]]:
+        """Return the (start, end) character offsets of every token in each text"""
+        if self.tokenizer is None:
+            return [[m.span() for m in WORD_PATTERN.finditer(text)] for text in texts]
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [encoding.offsets for encoding in encodings]
+
+    def split_blocks(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Split page text into (start, end, kind) blocks.
+
+        ``kind`` is "heading", "table" or "text". Blank lines end a block,
+        each heading line is its own block, and consecutive lines of the
+        same kind otherwise stay together.
+        """
+        lines = []
+        pos = 0
+        for line in text.splitlines(keepends=True):
+            line_start = pos
+            pos += len(line)
+            stripped = line.strip()
+            if not stripped:
+                lines.append((0, 0, None))
+                continue
+            if TABLE_PATTERN.search(stripped):
+                # Checked first so numeric or all-caps rows stay in their table
+                line_kind = "table"
+            elif self._is_heading(stripped):
+                line_kind = "heading"
+            else:
+                line_kind = "text"
+            start = line_start + len(line) - len(line.lstrip())
+            lines.append((start, start + len(stripped), line_kind))
+
+        # A lone column-like line is usually justified prose, not a table
+        for i, (start, end, line_kind) in enumerate(lines):
+            if (
+                line_kind == "table"
+                and (i == 0 or lines[i - 1][2] != "table")
+                and (i + 1 == len(lines) or lines[i + 1][2] != "table")
+            ):
+                lines[i] = (start, end, "text")
+
+        blocks = []
+        kind = None
+        start = end = 0
+        for line_start, line_end, line_kind in lines:
+            if kind is not None and (line_kind != kind or line_kind == "heading"):
+                blocks.append((start, end, kind))
+                kind = None
+            if line_kind is not None:
+                if kind is None:
+                    start = line_start
+                    kind = line_kind
+                end = line_end
+
+        if kind is not None:
+            blocks.append((start, end, kind))
+        return blocks
+
+    @staticmethod
+    def _is_heading(line: str) -> bool:
+        if len(line) > 80 or line.endswith((".", ",", ";")):
+            return False
+        if NUMBERED_HEADING_PATTERN.match(line):
+            return True
+        return bool(CAPS_HEADING_PATTERN.match(line)) and len(CAPS_WORD_PATTERN.findall(line)) >= 2
+
+    @staticmethod
+    def _span_tokens(starts: List[int], start: int, end: int) -> int:
+        """Count the tokens starting within text[start:end]"""
+        return bisect_left(starts, end) - bisect_left(starts, start)
+
+    def _units(self, text: str, starts: List[int], offsets: List[Tuple[int, int]]) -> List[Tuple[int, int, int, str]]:
+        """Turn blocks into (start, end, tokens, kind) units no larger than a child chunk"""
+        units: List[Tuple[int, int, int, str]] = []
+        for start, end, kind in self.split_blocks(text):
+            self._split_span(text, starts, offsets, start, end, kind, units)
+        return units
+
+    def _split_span(self, text: str, starts: List[int], offsets: List[Tuple[int, int]],
+                    start: int, end: int, kind: str, units: List[Tuple[int, int, int, str]],
+                    level: int = 0) -> None:
+        """
+        Append text[start:end] to ``units`` as pieces no larger than a child chunk.
+
+        Oversized spans are cut at line boundaries, then sentence boundaries,
+        packing as many whole lines or sentences per piece as fit. Only a
+        single sentence that is still too large falls back to token windows.
+        """
+        tokens = self._span_tokens(starts, start, end)
+        if tokens <= self.chunk_tokens:
+            units.append((start, end, tokens, kind))
+            return
+        if level == 2:
+            self._split_windows(starts, offsets, start, end, kind, units)
+            return
+
+        pattern = LINE_PATTERN if level == 0 else SENTENCE_PATTERN
+        group_start = group_end = None
+        for match in pattern.finditer(text, start, end):
+            seg_start, seg_end = match.start(), match.end()
+            if group_start is not None and self._span_tokens(starts, group_start, seg_end) > self.chunk_tokens:
+                self._split_span(text, starts, offsets, group_start, group_end, kind, units, level + 1)
+                group_start = None
+            if group_start is None:
+                group_start = seg_start
+            group_end = seg_end
+        if group_start is not None:
+            self._split_span(text, starts, offsets, group_start, group_end, kind, units, level + 1)
+
+    def _split_windows(self, starts: List[int], offsets: List[Tuple[int, int]],
+                       start: int, end: int, kind: str, units: List[Tuple[int, int, int, str]]) -> None:
+        """Cut a span into overlapping token windows whose edges fall on word starts"""
+        first = bisect_left(starts, start)
+        last = bisect_left(starts, end)
+
+        def word_start(i: int) -> bool:
+            # Sub-word tokens (e.g. WordPiece "##isation") touch the previous token
+            return i == first or i == last or offsets[i][0] != offsets[i - 1][1]
+
+        i = first
+        while True:
+            j = min(i + self.chunk_tokens, last)
+            edge = j
+            while edge > i + 1 and not word_start(edge):
+                edge -= 1
+            if word_start(edge):
+                j = edge
+            units.append((offsets[i][0], offsets[j - 1][1], j - i, kind))
+            if j == last:
+                return
+            nxt = max(j - self.chunk_overlap, i + 1)
+            while nxt > i + 1 and not word_start(nxt):
+                nxt -= 1
+            i = nxt if word_start(nxt) else j
+
+    def chunk_pages(self, pages: List[str]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Chunk a document given as one string per page.
+
+        Returns:
+            (children, parents) where each chunk is a dict with "text",
+            "page" (1-based), "section" and "tokens"; children also carry
+            "parent", the index of their parent in ``parents``.
+        """
+        children: List[Dict] = []
+        parents: List[Dict] = []
+        section = ""
+
+        for page_num, (text, offsets) in enumerate(zip(pages, self.token_offsets(pages)), 1):
+            starts = [s for s, _ in offsets]
+            parent_units: List[Tuple[int, int, int, str]] = []
+
+            for unit in self._units(text, starts, offsets):
+                # Measure the span rather than summing units, which would count
+                # the overlap between windows of a split block twice
+                if parent_units and (
+                    unit[3] == "heading"
+                    or self._span_tokens(starts, parent_units[0][0], unit[1]) > self.parent_tokens
+                ):
+                    self._emit(text, starts, page_num, section, parent_units, children, parents)
+                    parent_units = []
+                if unit[3] == "heading":
+                    section = text[unit[0]:unit[1]]
+                parent_units.append(unit)
+
+            if parent_units:
+                self._emit(text, starts, page_num, section, parent_units, children, parents)
+
+        return children, parents
+
+    def _emit(self, text: str, starts: List[int], page: int, section: str,
+              units: List[Tuple[int, int, int, str]], children: List[Dict], parents: List[Dict]) -> None:
+        """Append one parent and the children packed from its units"""
+        parent_index = len(parents)
+        parents.append({
+            "text": text[units[0][0]:units[-1][1]],
+            "page": page,
+            "section": section,
+            "tokens": self._span_tokens(starts, units[0][0], units[-1][1]),
+        })
+
+        group_start = group_end = None
+        for unit in units + [None]:
+            if group_start is not None and (
+                unit is None or self._span_tokens(starts, group_start, unit[1]) > self.chunk_tokens
+            ):
+                children.append({
+                    "text": text[group_start:group_end],
+                    "page": page,
+                    "section": section,
+                    "tokens": self._span_tokens(starts, group_start, group_end),
+                    "parent": parent_index,
+                })
+                group_start = None
+            if unit is not None:
+                if group_start is None:
+                    group_start = unit[0]
+                group_end = unit[1]
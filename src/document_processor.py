@@ -1,45 +1,72 @@
 import PyPDF2
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from typing import List
+from typing import List, Tuple
+from src.chunker import TextChunker
+from config.settings import CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, PARENT_CHUNK_TOKENS
 
 
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-        )
+    def __init__(
+        self,
+        chunk_tokens: int = CHUNK_TOKENS,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+        parent_tokens: int = PARENT_CHUNK_TOKENS,
+    ):
+        self.chunker = TextChunker(chunk_tokens, chunk_overlap, parent_tokens)
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
+    def extract_pages_from_pdf(self, pdf_path: str) -> List[str]:
+        """Extract the text of each page of a PDF file"""
         try:
             with open(pdf_path, "rb") as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page_num, page in enumerate(reader.pages):
-                    text += f"\n--- Page {page_num + 1} ---\n"
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text
-                return text
+                return [page.extract_text() or "" for page in reader.pages]
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
 
-    def process_document(self, file_path: str, filename: str) -> List[Document]:
-        """Process document and return chunks"""
-        text = self.extract_text_from_pdf(file_path)
-        chunks = self.text_splitter.split_text(text)
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Extract text from PDF file"""
+        return "".join(
+            f"\n--- Page {page_num} ---\n{page_text}"
+            for page_num, page_text in enumerate(self.extract_pages_from_pdf(pdf_path), 1)
+        )
+
+    def process_document(self, file_path: str, filename: str) -> Tuple[List[Document], List[Document]]:
+        """
+        Process document and return (chunks, parents).
+
+        Chunks are the small pieces to embed; each one's "parent_id" metadata
+        points at the larger parent chunk to hand to the LLM as context.
+        """
+        pages = self.extract_pages_from_pdf(file_path)
+        children, parents = self.chunker.chunk_pages(pages)
 
-        return [
+        parent_docs = [
+            Document(
+                page_content=parent["text"],
+                metadata={
+                    "filename": filename,
+                    "parent_id": f"{filename}#{i}",
+                    "source": file_path,
+                    "page": parent["page"],
+                    "section": parent["section"],
+                    "tokens": parent["tokens"],
+                },
+            )
+            for i, parent in enumerate(parents)
+        ]
+        chunk_docs = [
             Document(
-                page_content=chunk,
+                page_content=chunk["text"],
                 metadata={
                     "filename": filename,
                     "chunk_id": i,
+                    "parent_id": f"{filename}#{chunk['parent']}",
                     "source": file_path,
+                    "page": chunk["page"],
+                    "section": chunk["section"],
+                    "tokens": chunk["tokens"],
                 },
             )
-            for i, chunk in enumerate(chunks)
+            for i, chunk in enumerate(children)
         ]
+        return chunk_docs, parent_docs
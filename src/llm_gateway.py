@@ -0,0 +1,271 @@
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Deque, Dict, List, Mapping, Optional, Tuple
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain.schema import BaseMessage, ChatResult
+from utils.rate_limiter import RateLimiter
+from config.settings import (
+    GEMINI_API_KEY,
+    LLM_MODEL,
+    LLM_FALLBACK_MODELS,
+    LLM_BACKEND,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT,
+    LOCAL_LLM_LATENCY,
+)
+
+# HTTP statuses worth retrying: rate limits, server errors and gateway timeouts.
+# Google API errors (ResourceExhausted, ServiceUnavailable, DeadlineExceeded, ...)
+# expose these as their ``code``.
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# A quota that only resets the next day will not recover by retrying
+DAILY_QUOTA_PATTERN = re.compile(r"per\s*day|daily", re.IGNORECASE)
+# Fallback for errors that carry no status code
+RETRYABLE_TEXT_PATTERN = re.compile(
+    r"\b(?:429|503)\b|rate limit|resource exhausted|overloaded|temporarily unavailable",
+    re.IGNORECASE,
+)
+
+
+class LLMGatewayError(RuntimeError):
+    """Raised when every backend has failed, after retries; the last error is its cause"""
+
+
+class LLMGateway(BaseChatModel):
+    """
+    Chat model that routes every call through a shared gateway.
+
+    Identical prompts already in flight are coalesced into one backend
+    call. Each attempt waits on a token-bucket rate limit and a concurrency
+    cap, is bounded by ``timeout``, and transient failures are retried with
+    jittered exponential backoff before failing over to the next backend.
+    """
+
+    backends: List[BaseChatModel]
+    requests_per_minute: int = LLM_REQUESTS_PER_MINUTE
+    max_concurrency: int = LLM_MAX_CONCURRENCY
+    max_retries: int = LLM_MAX_RETRIES
+    timeout: float = LLM_TIMEOUT
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    history_size: int = 1000
+
+    _rate_limiter: RateLimiter = PrivateAttr()
+    _slots: threading.BoundedSemaphore = PrivateAttr()
+    _executor: ThreadPoolExecutor = PrivateAttr()
+    _inflight: Dict[Tuple, Future] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: Deque[Dict] = PrivateAttr()
+    _totals: Dict[str, float] = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if not self.backends:
+            raise ValueError("LLMGateway needs at least one backend model")
+        concurrency = max(self.max_concurrency, 1)
+        self._rate_limiter = RateLimiter(self.requests_per_minute)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm")
+        self._calls = deque(maxlen=self.history_size)
+        self._totals = {
+            "calls": 0, "coalesced": 0, "failed": 0, "attempts": 0, "failovers": 0,
+            "input_tokens": 0, "output_tokens": 0, "latency": 0.0,
+        }
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = (tuple((message.type, str(message.content)) for message in messages), tuple(stop or ()))
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self._inflight[key] = pending
+
+        if not leader:
+            # Someone is already asking exactly this; share their answer
+            with self._lock:
+                self._totals["coalesced"] += 1
+            return pending.result()
+
+        try:
+            result = self._call_with_failover(messages, stop)
+            pending.set_result(result)
+            return result
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _call_with_failover(self, messages: List[BaseMessage], stop: Optional[List[str]]) -> ChatResult:
+        """Try each backend in order, retrying transient errors on each"""
+        start = time.perf_counter()
+        attempts = 0
+        last_error: Optional[Exception] = None
+
+        for index, backend in enumerate(self.backends):
+            if index > 0:
+                print(f"[LLMGateway] Failing over to {self._model_name(backend)}")
+                with self._lock:
+                    self._totals["failovers"] += 1
+
+            for attempt in range(self.max_retries + 1):
+                attempts += 1
+                try:
+                    result = self._call_backend(backend, messages, stop)
+                    self._record(backend, result, attempts, time.perf_counter() - start)
+                    return result
+                except Exception as e:
+                    last_error = e
+                    if not self._is_retryable(e) or attempt == self.max_retries:
+                        print(f"[LLMGateway] {self._model_name(backend)} failed: {e}")
+                        break
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    print(f"[LLMGateway] {self._model_name(backend)} error, retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+
+        self._record(None, None, attempts, time.perf_counter() - start, error=last_error)
+        raise LLMGatewayError(f"All LLM backends failed after {attempts} attempts: {last_error}") from last_error
+
+    def _call_backend(self, backend: BaseChatModel, messages: List[BaseMessage],
+                      stop: Optional[List[str]]) -> ChatResult:
+        """Make one rate-limited backend call bounded by ``timeout``"""
+        self._rate_limiter.acquire()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(backend.generate, [messages], stop=stop)
+        except Exception:
+            self._slots.release()
+            raise
+        # Free the slot only when the worker finishes, so a timed-out call
+        # still counts against the concurrency cap until it returns
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            llm_result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"LLM call timed out after {self.timeout}s")
+        return ChatResult(generations=llm_result.generations[0], llm_output=llm_result.llm_output)
+
+    @staticmethod
+    def _status_code(error: BaseException) -> Optional[int]:
+        """Find an HTTP status on the error or its response, if it has one"""
+        response = getattr(error, "response", None)
+        for value in (
+            getattr(error, "code", None),
+            getattr(error, "status_code", None),
+            getattr(response, "status_code", None),
+        ):
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+        return None
+
+    @classmethod
+    def _is_retryable(cls, error: BaseException) -> bool:
+        """Classify by type or status code, falling back to the message only when neither applies"""
+        # Backend wrappers often re-raise the API error, so look at its cause too
+        for candidate in (error, error.__cause__):
+            if candidate is None:
+                continue
+            if isinstance(candidate, (TimeoutError, ConnectionError)):
+                return True
+            status = cls._status_code(candidate)
+            if status is not None:
+                if status == 429 and DAILY_QUOTA_PATTERN.search(str(candidate)):
+                    return False
+                return status in RETRYABLE_STATUS_CODES
+        text = str(error)
+        return bool(RETRYABLE_TEXT_PATTERN.search(text)) and not DAILY_QUOTA_PATTERN.search(text)
+
+    @staticmethod
+    def _model_name(backend: BaseChatModel) -> str:
+        return getattr(backend, "model", None) or getattr(backend, "model_name", None) or type(backend).__name__
+
+    def _record(self, backend: Optional[BaseChatModel], result: Optional[ChatResult], attempts: int,
+                latency: float, error: Optional[Exception] = None) -> None:
+        """Store accounting for one gateway call"""
+        usage: Dict = {}
+        if result is not None and result.generations:
+            usage = getattr(result.generations[0].message, "usage_metadata", None) or {}
+        entry = {
+            "model": self._model_name(backend) if backend is not None else None,
+            "attempts": attempts,
+            "latency": latency,
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "error": str(error) if error is not None else None,
+        }
+        with self._lock:
+            self._calls.append(entry)
+            self._totals["calls"] += 1
+            self._totals["failed"] += int(error is not None)
+            self._totals["attempts"] += attempts
+            self._totals["input_tokens"] += entry["input_tokens"]
+            self._totals["output_tokens"] += entry["output_tokens"]
+            self._totals["latency"] += latency
+
+    def set_requests_per_minute(self, requests_per_minute: int) -> None:
+        """Replace the rate limit, e.g. with a batch run's ``--rpm``"""
+        self.requests_per_minute = requests_per_minute
+        self._rate_limiter = RateLimiter(requests_per_minute)
+
+    def get_stats(self) -> Dict:
+        """Return running totals plus the most recent per-call records"""
+        with self._lock:
+            stats = dict(self._totals)
+            stats["recent_calls"] = list(self._calls)
+        stats["avg_latency"] = stats["latency"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    @property
+    def _identifying_params(self) -> Mapping[str, Any]:
+        return {"backends": [self._model_name(backend) for backend in self.backends]}
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm_gateway"
+
+
+def create_llm(backend: str = LLM_BACKEND) -> LLMGateway:
+    """
+    Build the gateway for the configured backend.
+
+    "gemini" uses LLM_MODEL then LLM_FALLBACK_MODELS through the Gemini API;
+    "local" uses the deterministic ChatGemini stub and needs no network.
+    """
+    if backend == "local":
+        from src.chat_gemini import ChatGemini
+
+        models = [ChatGemini(model=f"local-{LLM_MODEL}", latency=LOCAL_LLM_LATENCY)]
+    else:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        names = [LLM_MODEL or "gemini-2.5-flash"]
+        names += [name for name in LLM_FALLBACK_MODELS if name not in names]
+        models = [
+            ChatGoogleGenerativeAI(
+                model=name,
+                google_api_key=GEMINI_API_KEY,
+                temperature=0.7,
+                convert_system_message_to_human=True,
+                # The gateway owns retries and timeouts
+                max_retries=0,
+                timeout=LLM_TIMEOUT,
+            )
+            for name in names
+        ]
+    return LLMGateway(backends=models)
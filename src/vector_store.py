@@ -1,9 +1,12 @@
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings  # ✅ FIXED: Updated import
 from langchain.schema import Document
-from typing import List
+from typing import Dict, List, Optional
+import json
 import os
 
+PARENTS_FILE = "parents.json"
+
 
 class VectorStore:
     def __init__(self, db_path: str):
@@ -16,6 +19,7 @@ class VectorStore:
             model_name="sentence-transformers/all-MiniLM-L6-v2"
         )
         self.vectorstore = None
+        self.parents: Dict[str, Document] = {}
         self.load_or_create_store()
 
     def load_or_create_store(self):
@@ -31,12 +35,30 @@ class VectorStore:
             except Exception as e:
                 print(f"[VectorStore] Could not load FAISS index: {e}")
                 self.vectorstore = None
+            self.load_parents()
         else:
             os.makedirs(self.db_path, exist_ok=True)
             print(f"[VectorStore] Created new directory at {self.db_path}")
 
-    def add_documents(self, documents: List[Document]):
-        """Add documents to the vector store"""
+    def load_parents(self):
+        """Load parent chunks saved alongside the FAISS index"""
+        parents_path = os.path.join(self.db_path, PARENTS_FILE)
+        if not os.path.exists(parents_path):
+            return
+        try:
+            with open(parents_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.parents = {
+                parent_id: Document(page_content=item["page_content"], metadata=item["metadata"])
+                for parent_id, item in data.items()
+            }
+            print(f"[VectorStore] Loaded {len(self.parents)} parent chunks")
+        except Exception as e:
+            print(f"[VectorStore] Could not load parent chunks: {e}")
+            self.parents = {}
+
+    def add_documents(self, documents: List[Document], parents: Optional[List[Document]] = None):
+        """Add documents to the vector store, with the parent chunks they point to"""
         if self.vectorstore is None:
             self.vectorstore = FAISS.from_documents(documents, self.embeddings)
         else:
@@ -44,14 +66,63 @@ class VectorStore:
 
         # Save updated store
         self.vectorstore.save_local(self.db_path)
+
+        if parents:
+            for parent in parents:
+                self.parents[parent.metadata["parent_id"]] = parent
+            with open(os.path.join(self.db_path, PARENTS_FILE), "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        parent_id: {"page_content": doc.page_content, "metadata": doc.metadata}
+                        for parent_id, doc in self.parents.items()
+                    },
+                    f,
+                )
         print(f"[VectorStore] Saved vector store at {self.db_path}")
 
+    def expand_to_parents(self, documents: List[Document], max_tokens: Optional[int] = None) -> List[Document]:
+        """
+        Replace retrieved chunks with their parent chunks, in retrieval order.
+
+        Chunks sharing a parent collapse into one, and chunks without a known
+        parent are kept as they are. Stops before ``max_tokens`` would be
+        exceeded, always keeping at least one document.
+        """
+        expanded = []
+        seen = set()
+        total = 0
+        for doc in documents:
+            parent_id = doc.metadata.get("parent_id")
+            if parent_id is not None and parent_id in seen:
+                continue
+            context = self.parents.get(parent_id, doc)
+            tokens = context.metadata.get("tokens", 0)
+            if max_tokens is not None and expanded and total + tokens > max_tokens:
+                break
+            if parent_id is not None:
+                seen.add(parent_id)
+            expanded.append(context)
+            total += tokens
+        return expanded
+
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """Search for similar documents"""
         if self.vectorstore is None:
             return []
         return self.vectorstore.similarity_search(query, k=k)
 
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in a single model call"""
+        if not queries:
+            return []
+        return self.embeddings.embed_documents(queries)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        """Search for similar documents using a precomputed query embedding"""
+        if self.vectorstore is None:
+            return []
+        return self.vectorstore.similarity_search_by_vector(embedding, k=k)
+
     def get_retriever(self, k: int = 4):
         """Get retriever for the vector store"""
         if self.vectorstore is None:
@@ -0,0 +1,132 @@
+import json
+import threading
+
+from src.batch_runner import BatchRunner
+from src.query_router import QueryRouter
+
+
+class FakeVectorStore:
+    def embed_queries(self, queries):
+        return [[float(len(q))] for q in queries]
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        return []
+
+
+class FakeChatbot:
+    """Answers instantly, except queries listed in ``blocked`` wait for ``release``"""
+
+    def __init__(self, failing=(), blocked=()):
+        self.qa_chain = object()
+        self.query_router = QueryRouter()
+        self.vector_store = FakeVectorStore()
+        self.llm = None
+        self.failing = set(failing)
+        self.blocked = set(blocked)
+        self.release = threading.Event()
+
+    def answer_query(self, query, route=None, relevant_docs=None):
+        if query in self.blocked:
+            self.release.wait(5)
+        if query in self.failing:
+            # Hybrid answers merge the sources of both halves
+            return {"answer": "Web search error", "sources": ["error", "doc.pdf"], "route_used": route}
+        return {"answer": f"answer to {query}", "sources": ["doc.pdf"], "route_used": route}
+
+
+def write_queries(path, queries):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, query in enumerate(queries):
+            f.write(json.dumps({"id": f"q{i}", "query": query}) + "\n")
+
+
+def read_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_results_are_written_as_queries_finish(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_queries(input_path, ["slow", "fast one", "fast two"])
+    chatbot = FakeChatbot(blocked={"slow"})
+    runner = BatchRunner(chatbot, max_workers=2, embed_batch_size=1)
+
+    thread = threading.Thread(target=runner.run, args=(str(input_path), str(output_path)))
+    thread.start()
+    try:
+        # The fast answers reach the file while the slow query is still running
+        for _ in range(200):
+            if output_path.exists() and len(read_results(output_path)) == 2:
+                break
+            threading.Event().wait(0.01)
+        assert {r["id"] for r in read_results(output_path)} == {"q1", "q2"}
+    finally:
+        chatbot.release.set()
+        thread.join()
+
+    assert len(read_results(output_path)) == 3
+
+
+def test_partial_errors_are_retried_on_resume(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_queries(input_path, ["good", "bad"])
+
+    summary = BatchRunner(FakeChatbot(failing={"bad"})).run(str(input_path), str(output_path))
+    assert (summary["succeeded"], summary["failed"]) == (1, 1)
+
+    summary = BatchRunner(FakeChatbot()).run(str(input_path), str(output_path))
+    assert (summary["skipped"], summary["succeeded"], summary["failed"]) == (1, 1, 0)
+    assert [r["id"] for r in read_results(output_path)][-1] == "q1"
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    input_path = tmp_path / "in.jsonl"
+    input_path.write_text(
+        '{"id": "a", "query": "first"}\n'
+        '{"id": "b", "query": \n'
+        '["not", "an", "object"]\n'
+        '{"id": "c", "query": "second"}\n',
+        encoding="utf-8",
+    )
+
+    assert [q["id"] for q in BatchRunner.load_queries(str(input_path))] == ["a", "c"]
+
+
+def test_embedding_failure_is_recorded_for_the_batch(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_queries(input_path, ["policy term", "claim process", "waiting period"])
+    chatbot = FakeChatbot()
+    calls = []
+
+    def embed_queries(queries):
+        calls.append(queries)
+        if len(calls) == 1:
+            raise RuntimeError("embedding model crashed")
+        return [[0.0] for _ in queries]
+
+    chatbot.vector_store.embed_queries = embed_queries
+    summary = BatchRunner(chatbot, embed_batch_size=2).run(str(input_path), str(output_path))
+
+    results = {r["id"]: r for r in read_results(output_path)}
+    assert (summary["succeeded"], summary["failed"]) == (1, 2)
+    assert results["q0"]["error"] == results["q1"]["error"] == "embedding model crashed"
+    assert results["q2"]["error"] is None
+
+
+def test_unwritable_result_is_counted_as_failed(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_queries(input_path, ["good", "bad"])
+    chatbot = FakeChatbot()
+    answer_query = chatbot.answer_query
+
+    def answer_with_unserialisable_source(query, route=None, relevant_docs=None):
+        response = answer_query(query, route, relevant_docs)
+        if query == "bad":
+            response["sources"] = [object()]
+        return response
+
+    chatbot.answer_query = answer_with_unserialisable_source
+    summary = BatchRunner(chatbot).run(str(input_path), str(output_path))
+
+    assert (summary["succeeded"], summary["failed"]) == (1, 1)
+    assert [r["id"] for r in read_results(output_path)] == ["q0"]
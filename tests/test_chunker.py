@@ -0,0 +1,127 @@
+import re
+
+import pytest
+
+from src.chunker import TextChunker
+
+
+@pytest.fixture
+def chunker(monkeypatch):
+    """Chunker counting word tokens, so results don't depend on a downloaded tokenizer"""
+    monkeypatch.setattr(TextChunker, "_load_tokenizer", lambda self, name: None)
+    return TextChunker(chunk_tokens=20, chunk_overlap=5, parent_tokens=50)
+
+
+def kinds(chunker, text):
+    return [(text[start:end], kind) for start, end, kind in chunker.split_blocks(text)]
+
+
+def test_split_blocks_keeps_table_rows_together(chunker):
+    text = (
+        "BENEFIT TABLE\n"
+        "Year  Premium  Cover\n"
+        "2023  500  10000\n"
+        "2024  550  12000\n"
+        "30 days waiting period applies to all claims"
+    )
+    assert kinds(chunker, text) == [
+        ("BENEFIT TABLE", "heading"),
+        ("Year  Premium  Cover\n2023  500  10000\n2024  550  12000", "table"),
+        ("30 days waiting period applies to all claims", "text"),
+    ]
+
+
+def test_split_blocks_numbered_headings_and_sentences(chunker):
+    text = (
+        "2.1 Exclusions\n"
+        "War and nuclear risks are not covered\n"
+        "\n"
+        "3. Claims\n"
+        "15 working days are allowed for settlement\n"
+        "4. The insurer may cancel the policy."
+    )
+    assert kinds(chunker, text) == [
+        ("2.1 Exclusions", "heading"),
+        ("War and nuclear risks are not covered", "text"),
+        ("3. Claims", "heading"),
+        ("15 working days are allowed for settlement\n4. The insurer may cancel the policy.", "text"),
+    ]
+
+
+def test_chunk_pages_respects_pages_and_headings(chunker):
+    pages = [
+        "SCHEDULE OF BENEFITS\nHospital stays are covered.\n\nDay care is covered.",
+        "2.1 Exclusions\nWar is excluded.",
+    ]
+    children, parents = chunker.chunk_pages(pages)
+
+    assert [(p["page"], p["section"]) for p in parents] == [
+        (1, "SCHEDULE OF BENEFITS"),
+        (2, "2.1 Exclusions"),
+    ]
+    assert all(child["text"] in parents[child["parent"]]["text"] for child in children)
+
+
+def test_split_block_token_counts_ignore_window_overlap(chunker):
+    # One 35-word paragraph is split into overlapping 20-token windows
+    children, parents = chunker.chunk_pages([" ".join(["word"] * 35)])
+
+    assert len(parents) == 1
+    assert parents[0]["tokens"] == 35
+    assert [child["tokens"] for child in children] == [20, 20]
+
+
+def test_split_blocks_lone_column_line_is_prose(chunker):
+    # Justified text extracted from a PDF often has runs of spaces
+    text = (
+        "The insured  must notify  the insurer within thirty days\n"
+        "of any hospitalisation and submit all original bills"
+    )
+    assert [kind for _, kind in kinds(chunker, text)] == ["text"]
+
+
+def test_split_blocks_rejects_caps_noise_as_headings(chunker):
+    text = "UIN: BAJHLIP23020V012223\nTOTAL 500\nA B\nEXCLUSIONS AND LIMITS"
+    assert kinds(chunker, text) == [
+        ("UIN: BAJHLIP23020V012223\nTOTAL 500\nA B", "text"),
+        ("EXCLUSIONS AND LIMITS", "heading"),
+    ]
+
+
+def test_oversized_block_splits_at_lines_then_sentences(chunker):
+    lines = [
+        "Claims must be filed within thirty days of discharge from hospital.",
+        "Original bills and the discharge summary must be attached.",
+        "Late claims are reviewed case by case. Approval is not guaranteed. "
+        "Reasons for delay must be given in writing.",
+    ]
+    children, _ = chunker.chunk_pages(["\n".join(lines)])
+
+    assert [child["text"] for child in children] == [
+        lines[0],
+        lines[1],
+        "Late claims are reviewed case by case. Approval is not guaranteed.",
+        "Reasons for delay must be given in writing.",
+    ]
+
+
+def test_windows_never_split_sub_word_tokens(chunker, monkeypatch):
+    # WordPiece-style offsets: each word is a head token plus a "##" continuation
+    def sub_word_offsets(texts):
+        result = []
+        for text in texts:
+            offsets = []
+            for match in re.finditer(r"\w+", text):
+                offsets += [(match.start(), match.start() + 3), (match.start() + 3, match.end())]
+            result.append(offsets)
+        return result
+
+    monkeypatch.setattr(chunker, "token_offsets", sub_word_offsets)
+    # 30 words = 60 tokens in one line with no sentence breaks, forcing windows
+    text = " ".join(["organisation"] * 30)
+    children, _ = chunker.chunk_pages([text])
+
+    assert len(children) > 1
+    for child in children:
+        assert set(child["text"].split(" ")) == {"organisation"}
+        assert child["tokens"] <= 20
@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+
+from src.chat_gemini import ChatGemini
+from src.llm_gateway import LLMGateway, LLMGatewayError
+
+
+class ApiError(Exception):
+    """Stands in for a Google API error, which carries its HTTP status as ``code``"""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FailingGemini(ChatGemini):
+    error_code: int = 503
+    error_message: str = "Service unavailable"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise ApiError(self.error_message, self.error_code)
+
+
+def make_gateway(*backends, **kwargs):
+    kwargs.setdefault("requests_per_minute", 0)
+    kwargs.setdefault("backoff_base", 0.001)
+    return LLMGateway(backends=list(backends), **kwargs)
+
+
+def test_local_backend_is_deterministic():
+    gateway = make_gateway(ChatGemini(model="local"))
+
+    first = gateway.invoke("Context\nQuestion: What is covered?").content
+    second = gateway.invoke("Context\nQuestion: What is covered?").content
+
+    assert first == second
+    assert first.startswith("[local ") and first.endswith("Answer to: What is covered?")
+
+
+def test_identical_concurrent_prompts_are_coalesced():
+    gateway = make_gateway(ChatGemini(model="local", latency=0.3))
+    barrier = threading.Barrier(5)
+    answers = []
+
+    def ask():
+        barrier.wait()
+        answers.append(gateway.invoke("same prompt").content)
+
+    threads = [threading.Thread(target=ask) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = gateway.get_stats()
+    assert len(answers) == 5 and len(set(answers)) == 1
+    assert stats["calls"] == 1
+    assert stats["coalesced"] == 4
+
+
+def test_retries_then_fails_over_to_next_backend():
+    gateway = make_gateway(FailingGemini(model="bad"), ChatGemini(model="good"), max_retries=2)
+
+    answer = gateway.invoke("hello").content
+
+    stats = gateway.get_stats()
+    assert answer.startswith("[good ")
+    assert stats["attempts"] == 4
+    assert stats["failovers"] == 1
+    assert stats["recent_calls"][-1]["model"] == "good"
+
+
+def test_non_retryable_error_fails_over_without_retrying():
+    bad = FailingGemini(model="bad", error_code=400, error_message="max_output_tokens 5000 is too large")
+    gateway = make_gateway(bad, ChatGemini(model="good"), max_retries=3)
+
+    gateway.invoke("hello")
+
+    assert gateway.get_stats()["attempts"] == 2
+
+
+def test_timeout_is_retried_then_raised():
+    gateway = make_gateway(ChatGemini(model="slow", latency=0.5), timeout=0.05, max_retries=1)
+
+    with pytest.raises(LLMGatewayError) as excinfo:
+        gateway.invoke("hello")
+
+    assert isinstance(excinfo.value.__cause__, TimeoutError)
+
+    stats = gateway.get_stats()
+    assert stats["failed"] == 1
+    assert stats["attempts"] == 2
+
+
+def test_stats_record_tokens_and_latency():
+    gateway = make_gateway(ChatGemini(model="local"))
+
+    gateway.invoke("one two three")
+
+    stats = gateway.get_stats()
+    call = stats["recent_calls"][-1]
+    assert call["input_tokens"] == 3
+    assert call["output_tokens"] > 0
+    assert stats["input_tokens"] == 3
+    assert stats["avg_latency"] >= 0
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (ApiError("Resource has been exhausted", 429), True),
+        (ApiError("Service unavailable", 503), True),
+        (ApiError("max_output_tokens 5000 is too large", 400), False),
+        (ApiError("Quota exceeded for GenerateRequestsPerDayPerProjectPerModel", 429), False),
+        (TimeoutError("timed out"), True),
+        (ValueError("connection quota for model 500"), False),
+        (RuntimeError("429 Too Many Requests"), True),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert LLMGateway._is_retryable(error) is retryable
+
+
+def test_exhausted_backends_raise_gateway_error_with_cause():
+    gateway = make_gateway(FailingGemini(model="bad"), FailingGemini(model="worse"), max_retries=0)
+
+    with pytest.raises(LLMGatewayError) as excinfo:
+        gateway.invoke("hello")
+
+    assert isinstance(excinfo.value.__cause__, ApiError)
+    assert gateway.get_stats()["failed"] == 1
@@ -0,0 +1,33 @@
+import time
+
+from utils.rate_limiter import RateLimiter
+
+
+def test_burst_up_to_capacity_does_not_wait():
+    limiter = RateLimiter(600)
+
+    start = time.monotonic()
+    for _ in range(600):
+        limiter.acquire()
+
+    assert time.monotonic() - start < 0.05
+
+
+def test_waits_for_refill_once_empty():
+    limiter = RateLimiter(600)  # refills 10 tokens per second
+    limiter.acquire(600)
+
+    start = time.monotonic()
+    limiter.acquire()
+
+    assert time.monotonic() - start >= 0.08
+
+
+def test_zero_disables_limiting():
+    limiter = RateLimiter(0)
+
+    start = time.monotonic()
+    for _ in range(1000):
+        limiter.acquire()
+
+    assert time.monotonic() - start < 0.05
@@ -0,0 +1,31 @@
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int):
+        """
+        Thread-safe token bucket refilled at ``requests_per_minute``.
+        A value of 0 or less disables limiting.
+        """
+        self.capacity = max(requests_per_minute, 0)
+        self.rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1) -> None:
+        """Block until ``tokens`` are available, then consume them"""
+        if self.capacity <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)